@@ -3,8 +3,24 @@ data_handler.py - Manejo y procesamiento de archivos CSV
 Se encarga de leer, procesar y validar los datos del osciloscopio
 """
 
+import os
+import re
 import pandas as pd
 import numpy as np
+from stats import _stats, _a_float
+
+# pyarrow es opcional: su lector de CSV es multihilo
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+# Primer campo numérico de una línea (entero, decimal o notación científica)
+_NUM_RE = re.compile(rb'^\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*(?:,|$)')
+
+# Archivos más grandes que esto se leen por partes y en float32
+_TAMANO_STREAM = 200 * 1024 * 1024  # 200 MB
 
 class DataHandler:
     """
@@ -17,6 +33,10 @@ class DataHandler:
         """
         self.df = None  # DataFrame donde se guardarán los datos
         self.archivo_actual = None
+        self.dt = None  # Período de muestreo (s) del archivo cargado
+        self.fs = None  # Frecuencia de muestreo (Hz)
+        self.num_puntos = 0  # Filas del archivo cargado
+        self.num_canales = 0  # Columnas sin contar la de tiempo
     
     def cargar_csv(self, ruta_archivo):
         """
@@ -31,37 +51,235 @@ class DataHandler:
         Raises:
             Exception: Si hay problemas al cargar el archivo
         """
+        # Archivos muy grandes: leer por partes para no agotar la memoria
+        if os.path.getsize(ruta_archivo) > _TAMANO_STREAM:
+            return self.cargar_csv_stream(ruta_archivo)
+        
         self.archivo_actual = ruta_archivo
         
         # Intentar detectar el formato automáticamente
         skiprows = self.detectar_lineas_encabezado(ruta_archivo)
         
         try:
-            # Leer el CSV con pandas
-            # skiprows: salta las primeras líneas que no son datos
-            # header=0: usa la primera línea (después de skip) como nombres de columnas
-            self.df = pd.read_csv(
+            try:
+                self.df = self.leer_csv_numerico(ruta_archivo, skiprows)
+            except ValueError:
+                # Alguna celda no es numérica: volver al camino flexible
+                # skiprows: salta las primeras líneas que no son datos
+                # header=0: usa la primera línea (después de skip) como nombres de columnas
+                self.df = pd.read_csv(
+                    ruta_archivo,
+                    skiprows=skiprows,
+                    header=0,
+                    delimiter=',',
+                    engine='python'  # Motor más flexible
+                )
+                
+                # Convertir todas las columnas a numérico
+                self.df = self.convertir_a_numerico(self.df)
+            
+            # Limpiar nombres de columnas (quitar espacios)
+            self.df.columns = [str(col).strip() for col in self.df.columns]
+            
+            # Validar los datos
+            self.validar_datos()
+            
+            # Guardar las dimensiones del archivo para no volver a medirlas
+            self.num_puntos = len(self.df)
+            self.num_canales = len(self.df.columns) - 1
+            
+            # El período de muestreo no cambia dentro del archivo: calcularlo una vez
+            self.calcular_muestreo()
+            
+            return self.df
+            
+        except Exception as e:
+            raise Exception(f"Error al cargar el archivo: {str(e)}")
+    
+    def leer_csv_numerico(self, ruta_archivo, skiprows):
+        """
+        Lee un CSV cuyas columnas son todas numéricas (camino rápido)
+        
+        Usa el lector multihilo de pyarrow si está instalado y si no (o si
+        pyarrow falla) el motor C de pandas. En ambos casos el dtype es fijo,
+        sin parseo fila por fila ni boxing de floats como en el motor 'python'.
+        
+        Args:
+            ruta_archivo (str): Ruta completa del archivo CSV
+            skiprows (int): Líneas de encabezado a saltar
+            
+        Returns:
+            DataFrame: Datos leídos en float64
+            
+        Raises:
+            ValueError: Si alguna celda no es numérica
+        """
+        if pa is not None:
+            # Los nombres de columnas se leen con el motor C para usar sus reglas
+            # (duplicados como 'a.1', columnas sin nombre como 'Unnamed: N');
+            # pyarrow solo lee los datos, salteando también la línea del header
+            columnas = list(pd.read_csv(
                 ruta_archivo,
                 skiprows=skiprows,
                 header=0,
                 delimiter=',',
-                engine='python'  # Motor más flexible
-            )
+                nrows=0,
+                engine='c'
+            ).columns)
             
-            # Limpiar nombres de columnas (quitar espacios)
-            self.df.columns = self.df.columns.str.strip()
+            try:
+                tabla = pa_csv.read_csv(
+                    ruta_archivo,
+                    read_options=pa_csv.ReadOptions(skip_rows=skiprows + 1,
+                                                    column_names=columnas),
+                    convert_options=pa_csv.ConvertOptions(
+                        column_types={col: pa.float64() for col in columnas})
+                )
+                return tabla.to_pandas()
+            except pa.ArrowException:
+                # Formato que pyarrow no entiende: seguir con el motor C
+                pass
+        
+        return pd.read_csv(
+            ruta_archivo,
+            skiprows=skiprows,
+            header=0,
+            delimiter=',',
+            dtype=np.float64,
+            engine='c',
+            float_precision='high',
+            memory_map=True
+        )
+    
+    def cargar_csv_stream(self, ruta_archivo, dtype=np.float32):
+        """
+        Carga un archivo CSV grande leyéndolo por partes
+        
+        Los canales se guardan en float32 por defecto: la resolución del ADC del
+        osciloscopio (<= 16 bits) no necesita float64 y así se usa la mitad de
+        memoria. La columna de tiempo queda siempre en float64: sus valores
+        absolutos necesitan más precisión que la del ADC (de ella sale dt).
+        
+        Args:
+            ruta_archivo (str): Ruta completa del archivo CSV
+            dtype: Tipo numérico con el que se guardan los canales
             
-            # Convertir todas las columnas a numérico
-            self.df = self.convertir_a_numerico(self.df)
+        Returns:
+            DataFrame: Datos procesados
+            
+        Raises:
+            Exception: Si hay problemas al cargar el archivo
+        """
+        self.archivo_actual = ruta_archivo
+        
+        # Intentar detectar el formato automáticamente
+        skiprows = self.detectar_lineas_encabezado(ruta_archivo)
+        
+        try:
+            # Nombres de columnas para poder fijar el dtype de cada una
+            columnas = list(pd.read_csv(
+                ruta_archivo,
+                skiprows=skiprows,
+                header=0,
+                delimiter=',',
+                nrows=0,
+                engine='c'
+            ).columns)
+            tipos = {col: dtype for col in columnas}
+            tipos[columnas[0]] = np.float64
+            
+            try:
+                # Camino rápido: dtype fijo en el parser
+                tiempo, canales = self.leer_partes(ruta_archivo, skiprows, columnas, tipos, dtype)
+            except ValueError:
+                # Alguna celda no es numérica: leer de nuevo convirtiendo cada parte
+                tiempo, canales = self.leer_partes(ruta_archivo, skiprows, columnas, None, dtype)
+            
+            # Armar el DataFrame recién al final
+            nombres = [str(col).strip() for col in columnas]
+            self.df = pd.DataFrame(canales, columns=nombres[1:], copy=False)
+            self.df.insert(0, nombres[0], tiempo)
             
             # Validar los datos
             self.validar_datos()
             
+            # Guardar las dimensiones del archivo para no volver a medirlas
+            self.num_puntos = len(self.df)
+            self.num_canales = len(self.df.columns) - 1
+            
+            # El período de muestreo no cambia dentro del archivo: calcularlo una vez
+            self.calcular_muestreo()
+            
             return self.df
             
         except Exception as e:
             raise Exception(f"Error al cargar el archivo: {str(e)}")
     
+    def leer_partes(self, ruta_archivo, skiprows, columnas, tipos, dtype):
+        """
+        Lee un CSV por partes acumulando tiempo (float64) y canales (dtype)
+        
+        El control de valores inválidos se hace después sobre el archivo
+        completo (validar_datos).
+        
+        Args:
+            ruta_archivo (str): Ruta completa del archivo CSV
+            skiprows (int): Líneas de encabezado a saltar
+            columnas (list): Nombres de columnas (tal como los lee pandas)
+            tipos (dict): dtype por columna, o None para convertir cada parte
+                          con convertir_a_numerico (celdas inválidas -> NaN)
+            dtype: Tipo numérico con el que se guardan los canales
+            
+        Returns:
+            tuple: (tiempo, canales) arrays recortados a las filas leídas
+            
+        Raises:
+            ValueError: Si tipos no es None y alguna celda no es numérica
+            Exception: Si el archivo no tiene datos
+        """
+        tiempo = None
+        canales = None
+        filas = 0
+        
+        lector = pd.read_csv(
+            ruta_archivo,
+            skiprows=skiprows,
+            header=0,
+            delimiter=',',
+            dtype=tipos,
+            engine='c',
+            chunksize=1_048_576
+        )
+        
+        with lector:
+            for parte in lector:
+                if tipos is None:
+                    parte = self.convertir_a_numerico(parte)
+                
+                tiempo_parte = parte.iloc[:, 0].to_numpy(dtype=np.float64)
+                canales_parte = parte.iloc[:, 1:].to_numpy(dtype=dtype)
+                n = len(parte)
+                
+                if tiempo is None:
+                    tiempo = np.empty(n, dtype=np.float64)
+                    canales = np.empty((n, len(columnas) - 1), dtype=dtype)
+                
+                # Agrandar los arrays (al doble) si no entra la nueva parte
+                if filas + n > len(tiempo):
+                    nuevo_tamano = max(2 * len(tiempo), filas + n)
+                    tiempo = np.resize(tiempo, nuevo_tamano)
+                    canales = np.resize(canales, (nuevo_tamano, len(columnas) - 1))
+                
+                tiempo[filas:filas + n] = tiempo_parte
+                canales[filas:filas + n] = canales_parte
+                filas += n
+        
+        if tiempo is None:
+            raise Exception("El archivo no contiene datos")
+        
+        # Recortar el espacio sobrante
+        return tiempo[:filas], canales[:filas]
+    
     def detectar_lineas_encabezado(self, ruta_archivo):
         """
         Detecta automáticamente cuántas líneas de encabezado tiene el archivo
@@ -72,30 +290,25 @@ class DataHandler:
         Returns:
             int: Número de líneas a saltar
         """
-        with open(ruta_archivo, 'r') as f:
-            for i, linea in enumerate(f):
-                # Limpiar la línea
-                linea = linea.strip()
-                
-                # Saltar líneas vacías
-                if not linea:
-                    continue
-                
-                # Intentar detectar si es una línea de datos
-                # Los datos empiezan con un número (positivo o negativo) o notación científica
-                # Se considera que los datos no estan con coma sino con punto.
-                primera_parte = linea.split(',')[0].strip()
-                
-                try:
-                    # Si podemos convertir a float, probablemente sea datos
-                    # OJO: se asume que el primer valor no es numérico si estamos en encabezado
-                    # Por ej no se acepta: "0, Tiempo(s), Canal 1(V)" como encabezado válido.
-                    float(primera_parte)
-                    # La línea anterior debe ser el header, así que retornamos i-1
-                    return max(0, i - 1)
-                except ValueError:
-                    # No es un número, continuar buscando
-                    continue
+        # Leer solo el comienzo del archivo como bytes (el encabezado es corto)
+        with open(ruta_archivo, 'rb') as f:
+            inicio = f.read(8192)
+        
+        for i, linea in enumerate(inicio.split(b'\n')):
+            # Limpiar la línea (también quita el '\r' de archivos de Windows)
+            linea = linea.strip()
+            
+            # Saltar líneas vacías
+            if not linea:
+                continue
+            
+            # Los datos empiezan con un número (positivo o negativo) o notación científica
+            # Se considera que los datos no estan con coma sino con punto.
+            # OJO: se asume que el primer valor no es numérico si estamos en encabezado
+            # Por ej no se acepta: "0, Tiempo(s), Canal 1(V)" como encabezado válido.
+            if _NUM_RE.match(linea):
+                # La línea anterior debe ser el header, así que retornamos i-1
+                return max(0, i - 1)
         
         # Por defecto, asumir que hay 1 línea de encabezado
         return 1
@@ -110,11 +323,12 @@ class DataHandler:
         Returns:
             DataFrame: DataFrame con valores numéricos
         """
-        for col in df.columns:
-            # Convertir a numérico, valores inválidos se vuelven NaN
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        # Si todas las columnas ya son numéricas no hay nada que convertir
+        if all(pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes):
+            return df
         
-        return df
+        # Convertir a numérico, valores inválidos se vuelven NaN
+        return df.apply(pd.to_numeric, errors='coerce')
     
     def validar_datos(self):
         """
@@ -135,10 +349,37 @@ class DataHandler:
             raise Exception("El archivo no contiene datos")
         
         # Verificar que no haya demasiados valores NaN, no se si dejar esto
-        porcentaje_nan = (self.df.isna().sum().sum() / (len(self.df) * len(self.df.columns))) * 100
+        # Se recorre columna por columna (vistas, sin copiar el DataFrame ni
+        # pasar los canales float32 a float64). Una sola suma alcanza para
+        # saber si hay algún NaN (NaN se propaga), así que el conteo celda
+        # por celda solo se hace si hace falta
+        nan_count = 0
+        for i in range(len(self.df.columns)):
+            arr = self.df.iloc[:, i].to_numpy()
+            if np.isnan(arr.sum()):
+                nan_count += np.count_nonzero(np.isnan(arr))
+        
+        if nan_count == 0:
+            return
+        
+        porcentaje_nan = 100.0 * nan_count / (len(self.df) * len(self.df.columns))
         
         if porcentaje_nan > 50:
             raise Exception(f"El archivo tiene demasiados valores inválidos ({porcentaje_nan:.1f}%)")
+    
+    def calcular_muestreo(self):
+        """
+        Calcula el período y la frecuencia de muestreo a partir de la columna de tiempo
+        """
+        tiempo = self.df.iloc[:, 0].to_numpy()
+        
+        if len(tiempo) < 2:
+            self.dt = None
+            self.fs = None
+            return
+        
+        self.dt = float(tiempo[1] - tiempo[0])
+        self.fs = 1.0 / self.dt if self.dt != 0 else None
         
         
         # Esto de abajo podría saltarlo, no es necesario
@@ -155,15 +396,23 @@ class DataHandler:
         if self.df is None or columna not in self.df.columns:
             return None
         
-        datos = self.df[columna].dropna()  # Eliminar NaN
+        datos = _a_float(self.df[columna].to_numpy())
+        
+        # Mínimo, máximo, promedio y desvío en una sola pasada (ignora NaN)
+        n, minimo, maximo, promedio, std, _ = _stats(datos)
+        
+        # La mediana se calcula aparte (np.median usa selección parcial, O(N))
+        if n < datos.size:
+            datos = datos[~np.isnan(datos)]  # Eliminar NaN
+        mediana = np.median(datos) if n > 0 else np.nan
         
         estadisticas = {
-            'minimo': datos.min(),
-            'maximo': datos.max(),
-            'promedio': datos.mean(),
-            'std': datos.std(),
-            'mediana': datos.median(),
-            'vpp': datos.max() - datos.min()  # Voltaje pico a pico
+            'minimo': minimo,
+            'maximo': maximo,
+            'promedio': promedio,
+            'std': std,
+            'mediana': mediana,
+            'vpp': maximo - minimo  # Voltaje pico a pico (mín/máx del mismo recorrido, sin otra pasada)
         }
         
         return estadisticas
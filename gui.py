@@ -3,7 +3,9 @@ gui.py - Interfaz gráfica del visor de osciloscopio
 Maneja todos los elementos visuales y la interacción con el usuario
 """
 
+import os
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox, ttk
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
@@ -33,6 +35,13 @@ class OsciloscopioGUI:
         # Variable para guardar los datos cargados
         self.df = None
         
+        # Hilo para cargar archivos sin bloquear la interfaz
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        
+        # Líneas ya dibujadas por canal, se reutilizan en cada actualización
+        self.lines = {}
+        self._actualizando = False
+        
         # Crear los componentes de la interfaz
         self.crear_menu()
         self.crear_panel_control()
@@ -46,11 +55,11 @@ class OsciloscopioGUI:
         self.root.config(menu=menubar)
         
         # Menú Archivo
-        archivo_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Archivo", menu=archivo_menu)
-        archivo_menu.add_command(label="Abrir CSV", command=self.abrir_archivo)
-        archivo_menu.add_separator()
-        archivo_menu.add_command(label="Salir", command=self.root.quit)
+        self.archivo_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Archivo", menu=self.archivo_menu)
+        self.archivo_menu.add_command(label="Abrir CSV", command=self.abrir_archivo)
+        self.archivo_menu.add_separator()
+        self.archivo_menu.add_command(label="Salir", command=self.root.quit)
         
         # Menú Ayuda
         ayuda_menu = tk.Menu(menubar, tearoff=0)
@@ -69,9 +78,9 @@ class OsciloscopioGUI:
         tk.Label(panel, text="Controles", font=('Arial', 14, 'bold'), bg='lightgray').pack(pady=10)
         
         # Botón para cargar archivo
-        btn_cargar = tk.Button(panel, text="📁 Cargar CSV", command=self.abrir_archivo,
-                               width=20, height=2, bg='#4CAF50', fg='white', font=('Arial', 10, 'bold'))
-        btn_cargar.pack(pady=10)
+        self.btn_cargar = tk.Button(panel, text="📁 Cargar CSV", command=self.abrir_archivo,
+                                    width=20, height=2, bg='#4CAF50', fg='white', font=('Arial', 10, 'bold'))
+        self.btn_cargar.pack(pady=10)
         
         # Separador visual
         ttk.Separator(panel, orient='horizontal').pack(fill='x', pady=10)
@@ -119,6 +128,11 @@ class OsciloscopioGUI:
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
+        # Fondo del eje (sin las líneas) para redibujar solo los datos con blitting
+        # Se vuelve a capturar cada vez que matplotlib redibuja todo (zoom, pan, resize)
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        
         # Agregar toolbar de matplotlib (zoom, pan, guardar)
         toolbar = NavigationToolbar2Tk(self.canvas, frame_grafico)
         toolbar.update()
@@ -135,22 +149,74 @@ class OsciloscopioGUI:
         
         # Si el usuario seleccionó un archivo
         if archivo:
-            try:
-                # Cargar los datos usando el DataHandler
-                self.df = self.data_handler.cargar_csv(archivo)
-                
-                # Actualizar la interfaz
-                self.crear_checkboxes_canales()
-                self.actualizar_info_archivo(archivo)
-                self.btn_graficar.config(state=tk.NORMAL)
-                
-                # Graficar automáticamente
-                self.actualizar_grafico()
-                
-                messagebox.showinfo("Éxito", "Archivo cargado correctamente")
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"No se pudo cargar el archivo:\n{str(e)}")
+            # Cargar los datos en segundo plano para no congelar la ventana
+            # No se permite otra carga hasta que termine esta
+            self.habilitar_carga(False)
+            texto_anterior = self.info_label.cget('text')
+            self.info_label.config(text="Cargando archivo...")
+            fut = self._executor.submit(self.cargar_archivo, archivo)
+            
+            # Tkinter solo se puede tocar desde el hilo principal:
+            # el resultado se procesa ahí con root.after
+            fut.add_done_callback(lambda f: self.root.after(0, self._on_loaded, f, archivo, texto_anterior))
+    
+    def cargar_archivo(self, archivo):
+        """
+        Carga el archivo (se ejecuta en el hilo de carga)
+        
+        Las dimensiones se devuelven junto con los datos para que el hilo
+        principal no lea el estado compartido del DataHandler.
+        
+        Args:
+            archivo: Ruta del archivo a cargar
+            
+        Returns:
+            tuple: (DataFrame, número de puntos, número de canales)
+        """
+        df = self.data_handler.cargar_csv(archivo)
+        return df, self.data_handler.num_puntos, self.data_handler.num_canales
+    
+    def habilitar_carga(self, habilitar):
+        """
+        Habilita o deshabilita el botón y el menú para abrir archivos
+        
+        Args:
+            habilitar (bool): True para habilitar
+        """
+        estado = tk.NORMAL if habilitar else tk.DISABLED
+        self.btn_cargar.config(state=estado)
+        self.archivo_menu.entryconfig("Abrir CSV", state=estado)
+    
+    def _on_loaded(self, fut, archivo, texto_anterior):
+        """
+        Actualiza la interfaz cuando termina la carga del archivo
+        
+        Args:
+            fut: Future de la carga ((DataFrame, puntos, canales) o excepción)
+            archivo: Ruta del archivo cargado
+            texto_anterior: Información mostrada antes de la carga (se restaura si falla)
+        """
+        # La carga terminó: se puede abrir otro archivo
+        self.habilitar_carga(True)
+        
+        try:
+            # Obtener los datos (relanza la excepción de la carga si la hubo)
+            self.df, num_puntos, num_canales = fut.result()
+            
+            # Actualizar la interfaz
+            self.reiniciar_grafico()
+            self.crear_checkboxes_canales()
+            self.actualizar_info_archivo(archivo, num_puntos, num_canales)
+            self.btn_graficar.config(state=tk.NORMAL)
+            
+            # Graficar automáticamente
+            self.actualizar_grafico()
+            
+            messagebox.showinfo("Éxito", "Archivo cargado correctamente")
+            
+        except Exception as e:
+            self.info_label.config(text=texto_anterior)
+            messagebox.showerror("Error", f"No se pudo cargar el archivo:\n{str(e)}")
     
     def crear_checkboxes_canales(self):
         """
@@ -173,16 +239,16 @@ class OsciloscopioGUI:
             chk.pack(anchor=tk.W, padx=10)
             self.canal_vars.append((col, var))
     
-    def actualizar_info_archivo(self, archivo):
+    def actualizar_info_archivo(self, archivo, num_puntos, num_canales):
         """
         Actualiza la información mostrada sobre el archivo cargado
         
         Args:
             archivo: Ruta del archivo cargado
+            num_puntos (int): Cantidad de puntos del archivo
+            num_canales (int): Cantidad de canales del archivo
         """
-        nombre = archivo.split('/')[-1]  # Obtener solo el nombre del archivo
-        num_puntos = len(self.df)
-        num_canales = len(self.df.columns) - 1
+        nombre = os.path.basename(archivo)  # Obtener solo el nombre del archivo
         
         info = f"Archivo: {nombre}\n\n"
         info += f"Canales: {num_canales}\n"
@@ -204,14 +270,78 @@ class OsciloscopioGUI:
             messagebox.showwarning("Advertencia", "Selecciona al menos un canal")
             return
         
-        # Limpiar gráfico anterior
-        self.ax.clear()
+        # Actualizar los datos de las líneas existentes en lugar de
+        # limpiar el eje y volver a crear todo (títulos, ticks, grilla)
+        # animated=True: las líneas no quedan en el fondo capturado
+        # Mientras se reajustan los límites no hace falta reducir por ventana:
+        # update_lines ya redujo la señal completa
+        self._actualizando = True
+        try:
+            self.plotter.update_lines(self.ax, self.df, canales_seleccionados,
+                                      self.lines, animated=True)
+            
+            # Reajustar los límites a los datos visibles
+            # (el zoom de la toolbar desactiva el autoescalado: volver a la vista completa)
+            limites = (self.ax.get_xlim(), self.ax.get_ylim())
+            self.ax.set_autoscale_on(True)
+            self.ax.relim(visible_only=True)
+            self.ax.autoscale_view()
+        finally:
+            self._actualizando = False
         
-        # Graficar usando el Plotter
-        self.plotter.graficar_canales(self.ax, self.df, canales_seleccionados)
+        if self._bg is not None and limites == (self.ax.get_xlim(), self.ax.get_ylim()):
+            # Los ejes no cambiaron: restaurar el fondo y dibujar solo las líneas
+            self.canvas.restore_region(self._bg)
+            self._dibujar_animados()
+            self.canvas.blit(self.ax.bbox)
+        else:
+            # Cambiaron los límites (ticks, etiquetas): redibujar todo
+            self.canvas.draw_idle()
+    
+    def _on_xlim_changed(self, ax):
+        """
+        Al hacer zoom o pan, vuelve a reducir las líneas al rango visible
+        (matplotlib redibuja después del cambio de límites)
+        """
+        if self._actualizando or self.df is None:
+            return
         
-        # Redibujar canvas
-        self.canvas.draw()
+        self.plotter.ajustar_ventana(self.ax, self.df, self.lines)
+    
+    def _on_draw(self, event):
+        """
+        Captura el fondo después de cada redibujado completo y dibuja encima
+        las líneas animadas (que matplotlib no incluye en ese redibujado)
+        """
+        if self.canvas.is_saving():
+            return
+        
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._dibujar_animados()
+    
+    def _dibujar_animados(self):
+        """
+        Dibuja las líneas visibles y la leyenda sobre el fondo actual
+        """
+        for linea in self.lines.values():
+            if linea.get_visible():
+                self.ax.draw_artist(linea)
+        
+        leyenda = self.ax.get_legend()
+        if leyenda is not None:
+            self.ax.draw_artist(leyenda)
+    
+    def reiniciar_grafico(self):
+        """
+        Deja el gráfico vacío y configurado para un archivo nuevo
+        """
+        self.ax.clear()
+        self.lines = {}
+        self._bg = None  # El fondo viejo ya no sirve
+        self.plotter.configurar_grafico(self.ax)
+        
+        # ax.clear() borra los callbacks del eje: reconectar el de zoom/pan
+        self.ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
     
     def mostrar_acerca_de(self):
         """
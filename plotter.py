@@ -3,8 +3,117 @@ plotter.py - Manejo de gráficos
 Se encarga de crear y personalizar los gráficos de las señales
 """
 
+import matplotlib as mpl
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import numpy as np
+from stats import njit, _stats, _a_float, _FASTMATH, _FIRMA_LTTB, _HAY_NUMBA
+
+# scipy.fft es opcional: permite calcular la FFT con varios hilos
+try:
+    from scipy import fft as _sp_fft
+except ImportError:
+    _sp_fft = None
+
+
+@njit(_FIRMA_LTTB, cache=True, fastmath=_FASTMATH)
+def _lttb(x, y, n_out):
+    """
+    Reduce una serie a n_out puntos con Largest-Triangle-Three-Buckets (LTTB)
+    
+    Conserva la forma visual de la señal (picos incluidos) eligiendo en cada
+    grupo el punto que forma el triángulo de mayor área con el punto elegido
+    anteriormente y el promedio del grupo siguiente.
+    
+    Args:
+        x: Array de tiempos (float64)
+        y: Array de voltajes (float32 o float64)
+        n_out (int): Cantidad de puntos de salida
+        
+    Returns:
+        tuple: (xs, ys) arrays reducidos
+    """
+    n = x.size
+    xs = np.empty(n_out)
+    ys = np.empty(n_out)
+    
+    # El primer y el último punto se conservan siempre
+    xs[0] = x[0]
+    ys[0] = y[0]
+    
+    # Tamaño de cada grupo (sin contar los extremos)
+    paso = (n - 2) / (n_out - 2)
+    a = 0
+    
+    for i in range(n_out - 2):
+        # Promedio del grupo siguiente
+        inicio_prom = int((i + 1) * paso) + 1
+        fin_prom = min(int((i + 2) * paso) + 1, n)
+        prom_x = 0.0
+        prom_y = 0.0
+        for j in range(inicio_prom, fin_prom):
+            prom_x += x[j]
+            prom_y += y[j]
+        cantidad = fin_prom - inicio_prom
+        prom_x /= cantidad
+        prom_y /= cantidad
+        
+        # Punto del grupo actual con el triángulo de mayor área
+        inicio = int(i * paso) + 1
+        fin = int((i + 1) * paso) + 1
+        ax_ = x[a]
+        ay_ = y[a]
+        area_max = -1.0
+        elegido = inicio
+        for j in range(inicio, fin):
+            area = abs((ax_ - prom_x) * (y[j] - ay_) - (ax_ - x[j]) * (prom_y - ay_))
+            if area > area_max:
+                area_max = area
+                elegido = j
+        
+        xs[i + 1] = x[elegido]
+        ys[i + 1] = y[elegido]
+        a = elegido
+    
+    xs[n_out - 1] = x[n - 1]
+    ys[n_out - 1] = y[n - 1]
+    
+    return xs, ys
+
+
+def _decimar_minmax(x, y, n_out):
+    """
+    Reduce una serie a ~n_out puntos guardando el mínimo y el máximo de cada grupo
+    
+    Alternativa vectorizada a _lttb para cuando numba no está instalado
+    (el bucle de LTTB en Python puro es más lento que dibujar todo).
+    
+    Args:
+        x: Array de tiempos
+        y: Array de voltajes
+        n_out (int): Cantidad aproximada de puntos de salida
+        
+    Returns:
+        tuple: (xs, ys) arrays reducidos
+    """
+    grupos = max(n_out // 2, 1)
+    tamano = len(x) // grupos
+    usados = tamano * grupos
+    
+    # Índices del mínimo y del máximo de cada grupo, en orden de tiempo
+    bloques = y[:usados].reshape(grupos, tamano)
+    inicio = np.arange(grupos) * tamano
+    indices = np.sort(np.stack([inicio + bloques.argmin(axis=1),
+                                inicio + bloques.argmax(axis=1)], axis=1), axis=1).ravel()
+    
+    # Las muestras que sobran al final forman un último grupo
+    if usados < len(x):
+        resto = y[usados:]
+        extra = np.sort([usados + resto.argmin(), usados + resto.argmax()])
+        indices = np.concatenate([indices, extra])
+    
+    return x[indices], y[indices]
 
 class Plotter:
     """
@@ -28,43 +137,164 @@ class Plotter:
             '#A8E6CF',  # Verde pastel
             '#FF8B94'   # Rosa claro
         ]
+        
+        # Simplificar los trazos densos al dibujar: Agg descarta los segmentos
+        # casi colineales (menos de 1 pixel de desvío) y dibuja por partes
+        mpl.rcParams['path.simplify'] = True
+        mpl.rcParams['path.simplify_threshold'] = 1.0
+        mpl.rcParams['agg.path.chunksize'] = 10000
     
     def graficar_canales(self, ax, df, canales):
         """
         Grafica los canales seleccionados en el eje proporcionado
         
+        No limpia el eje: si se quiere partir de un gráfico vacío hay que
+        llamar a ax.clear() antes.
+        
         Args:
             ax: Eje de matplotlib donde graficar
             df: DataFrame con los datos
             canales (list): Lista de nombres de canales a graficar
         """
-        # Limpiar el gráfico anterior
-        ax.clear()
-        
-        # Obtener la columna de tiempo (primera columna)
-        tiempo = df[df.columns[0]]
+        # Obtener la columna de tiempo (primera columna) como array de numpy
+        tiempo = _a_float(df.iloc[:, 0].to_numpy())
         
-        # Graficar cada canal
+        # Armar un tramo por canal (reduciendo puntos si la señal es muy larga)
+        # Cada canal se toma como vista de su columna, sin copiar ni pasar a float64
+        segmentos = []
+        colores = []
         for i, canal in enumerate(canales):
-            # Seleccionar color (ciclar si hay más canales que colores)
-            color = self.colores[i % len(self.colores)]
-            
-            # Obtener datos del canal
-            voltaje = df[canal]
+            voltaje = _a_float(df[canal].to_numpy())
+            tiempo_graf, voltaje_graf = self.reducir_puntos(ax, tiempo, voltaje)
+            segmentos.append(np.column_stack([tiempo_graf, voltaje_graf]))
             
-            # Graficar
-            ax.plot(tiempo, voltaje, 
-                   label=f'Canal {canal}',
-                   color=color,
-                   linewidth=1.5,
-                   alpha=0.8)  # Transparencia
+            # Seleccionar color (ciclar si hay más canales que colores)
+            colores.append(self.colores[i % len(self.colores)])
+        
+        # Graficar todos los canales como un único artista
+        # rasterized: al exportar a PDF/SVG la señal se guarda como imagen
+        coleccion = LineCollection(segmentos,
+                                   colors=colores,
+                                   linewidths=1.5,
+                                   alpha=0.8,  # Transparencia
+                                   rasterized=True)
+        ax.add_collection(coleccion)
+        ax.autoscale_view()
         
         # Configurar el gráfico
         self.configurar_grafico(ax)
         
         # Agregar leyenda si hay múltiples canales
+        # La colección es un solo artista: la leyenda usa líneas "proxy" por canal
         if len(canales) > 1:
-            ax.legend(loc='upper right', framealpha=0.9)
+            proxies = [Line2D([], [], color=color, linewidth=1.5, alpha=0.8,
+                              label=f'Canal {canal}')
+                       for canal, color in zip(canales, colores)]
+            ax.legend(handles=proxies, loc='upper right', framealpha=0.9)
+    
+    def update_lines(self, ax, df, canales, lineas, animated=False):
+        """
+        Actualiza los datos de líneas ya creadas en lugar de volver a graficar
+        
+        Sirve para redibujar sin limpiar el eje (títulos, ticks y grilla se
+        conservan). Las líneas que faltan se crean y las de canales que no
+        están en la lista se ocultan. No ajusta los límites del eje.
+        
+        Args:
+            ax: Eje de matplotlib donde graficar
+            df: DataFrame con los datos
+            canales (list): Lista de nombres de canales a mostrar
+            lineas (dict): Líneas ya creadas por canal (se modifica)
+            animated (bool): Crear las líneas y la leyenda como animadas (blitting)
+        """
+        # Obtener la columna de tiempo (primera columna)
+        tiempo = _a_float(df.iloc[:, 0].to_numpy())
+        
+        # Ocultar los canales que no se muestran
+        for canal, linea in lineas.items():
+            if canal not in canales:
+                linea.set_visible(False)
+        
+        visibles = []
+        for i, canal in enumerate(canales):
+            # Crear la línea la primera vez que se grafica el canal
+            # El color depende de la posición del canal en el archivo (no cambia al ocultar otros)
+            if canal not in lineas:
+                indice = df.columns.get_loc(canal) - 1
+                linea, = ax.plot([], [], label=f'Canal {canal}',
+                                 color=self.colores[indice % len(self.colores)],
+                                 linewidth=1.5, alpha=0.8, animated=animated,
+                                 rasterized=True)
+                lineas[canal] = linea
+            
+            # Vista de la columna del canal (sin copiar ni pasar a float64)
+            voltaje = _a_float(df[canal].to_numpy())
+            lineas[canal].set_data(*self.reducir_puntos(ax, tiempo, voltaje))
+            lineas[canal].set_visible(True)
+            visibles.append(lineas[canal])
+        
+        # Leyenda solo con los canales visibles (si hay más de uno)
+        leyenda = ax.get_legend()
+        if leyenda is not None:
+            leyenda.remove()
+        if len(visibles) > 1:
+            leyenda = ax.legend(handles=visibles, loc='upper right', framealpha=0.9)
+            leyenda.set_animated(animated)
+    
+    def ajustar_ventana(self, ax, df, lineas):
+        """
+        Vuelve a reducir las líneas visibles al rango de tiempo visible del eje
+        
+        Se usa al hacer zoom o pan: así la ventana visible muestra todas las
+        muestras que entran en pantalla y no solo las elegidas para la señal
+        completa. No cambia los límites del eje.
+        
+        Args:
+            ax: Eje de matplotlib
+            df: DataFrame con los datos
+            lineas (dict): Líneas ya creadas por canal
+        """
+        tiempo = _a_float(df.iloc[:, 0].to_numpy())
+        xlim = ax.get_xlim()
+        
+        for canal, linea in lineas.items():
+            if linea.get_visible():
+                voltaje = _a_float(df[canal].to_numpy())
+                linea.set_data(*self.reducir_puntos(ax, tiempo, voltaje, xlim))
+    
+    def reducir_puntos(self, ax, tiempo, voltaje, xlim=None):
+        """
+        Reduce una señal a la cantidad de puntos que se pueden ver en el eje
+        
+        El DataFrame conserva todos los datos para FFT/estadísticas, esto
+        solo afecta lo que se dibuja.
+        
+        Args:
+            ax: Eje de matplotlib donde se va a graficar
+            tiempo: Array de tiempos (creciente)
+            voltaje: Array de voltajes
+            xlim (tuple): Rango de tiempo visible. Si se pasa, solo se grafica
+                          ese tramo (más una muestra de cada lado)
+            
+        Returns:
+            tuple: (tiempo, voltaje) listos para graficar
+        """
+        if xlim is not None:
+            inicio = max(np.searchsorted(tiempo, min(xlim), side='left') - 1, 0)
+            fin = min(np.searchsorted(tiempo, max(xlim), side='right') + 1, len(tiempo))
+            tiempo = tiempo[inicio:fin]
+            voltaje = voltaje[inicio:fin]
+        
+        # Cantidad de puntos que vale la pena dibujar (~2 por pixel de ancho)
+        n_out = max(2000, int(ax.bbox.width) * 2)
+        
+        # Si la ventana ya tiene pocas muestras se dibujan todas
+        if len(tiempo) > n_out:
+            if _HAY_NUMBA:
+                return _lttb(tiempo, voltaje, n_out)
+            return _decimar_minmax(tiempo, voltaje, n_out)
+        
+        return tiempo, voltaje
     
     def configurar_grafico(self, ax):
         """
@@ -103,21 +333,23 @@ class Plotter:
         ax.clear()
         
         # Obtener datos
-        tiempo = df[df.columns[0]]
-        voltaje = df[canal]
+        tiempo = _a_float(df.iloc[:, 0].to_numpy())
+        voltaje = _a_float(df[canal].to_numpy())
         
         # Graficar señal principal
         ax.plot(tiempo, voltaje, label=f'Canal {canal}', 
                color=self.colores[0], linewidth=1.5)
         
-        # Calcular y mostrar estadísticas
+        # Calcular estadísticas en una sola pasada sobre la señal
+        _, _, _, promedio, _, promedio_cuadrado = _stats(voltaje)
+        
+        # Mostrar estadísticas
         if mostrar_promedio:
-            promedio = voltaje.mean()
             ax.axhline(y=promedio, color='red', linestyle='--', 
                       linewidth=1, label=f'Promedio: {promedio:.3f} V', alpha=0.7)
         
         if mostrar_rms:
-            rms = np.sqrt(np.mean(voltaje**2))
+            rms = np.sqrt(promedio_cuadrado)
             ax.axhline(y=rms, color='orange', linestyle='--', 
                       linewidth=1, label=f'RMS: {rms:.3f} V', alpha=0.7)
             ax.axhline(y=-rms, color='orange', linestyle='--', 
@@ -127,7 +359,7 @@ class Plotter:
         self.configurar_grafico(ax)
         ax.legend(loc='upper right', framealpha=0.9)
     
-    def graficar_fft(self, ax, df, canal):
+    def graficar_fft(self, ax, df, canal, dt=None):
         """
         Grafica la Transformada Rápida de Fourier (análisis de frecuencia)
         
@@ -135,25 +367,31 @@ class Plotter:
             ax: Eje de matplotlib
             df: DataFrame con los datos
             canal (str): Nombre del canal
+            dt (float): Período de muestreo (ej. DataHandler.dt). Si no se
+                        pasa, se calcula con las dos primeras muestras de tiempo
         """
         # Limpiar
         ax.clear()
         
         # Obtener datos
-        tiempo = df[df.columns[0]]
-        voltaje = df[canal]
+        voltaje = df[canal].to_numpy(dtype=np.float64)
         
         # Calcular paso de tiempo
-        dt = tiempo.iloc[1] - tiempo.iloc[0]
+        if dt is None:
+            tiempo = df.iloc[:, 0].to_numpy()
+            dt = float(tiempo[1] - tiempo[0])
         
-        # Calcular FFT
-        fft = np.fft.fft(voltaje)
-        freq = np.fft.fftfreq(len(voltaje), dt)
+        # Calcular FFT (la señal es real: rfft calcula solo frecuencias >= 0)
+        v = np.ascontiguousarray(voltaje)
+        if _sp_fft is not None:
+            fft = _sp_fft.rfft(v, workers=-1)
+        else:
+            fft = np.fft.rfft(v)
+        freq = np.fft.rfftfreq(v.size, dt)
         
-        # Solo frecuencias positivas
-        mask = freq > 0
-        freq = freq[mask]
-        fft_mag = np.abs(fft[mask])
+        # Descartar la componente continua (DC)
+        freq = freq[1:]
+        fft_mag = np.abs(fft[1:])
         
         # Graficar
         ax.plot(freq, fft_mag, color=self.colores[2], linewidth=1.5)
@@ -180,8 +418,8 @@ class Plotter:
         ax.clear()
         
         # Obtener datos
-        x = df[canal1]
-        y = df[canal2]
+        x = df[canal1].to_numpy(dtype=np.float64)
+        y = df[canal2].to_numpy(dtype=np.float64)
         
         # Graficar
         ax.plot(x, y, color=self.colores[4], linewidth=1.5, alpha=0.7)
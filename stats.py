@@ -0,0 +1,129 @@
+"""
+stats.py - Cálculo de estadísticas de las señales
+Kernels numéricos que recorren cada canal una sola vez
+"""
+
+import numpy as np
+
+# numba es opcional: sin numba los kernels correrían en Python puro (mucho más
+# lentos que numpy), así que quien los usa consulta _HAY_NUMBA para elegir
+# una alternativa vectorizada
+try:
+    from numba import njit, types
+    _HAY_NUMBA = True
+    
+    # Firmas explícitas de los kernels: se compilan al importar el módulo y
+    # cache=True los guarda en __pycache__ para las próximas ejecuciones.
+    # Los arrays de entrada son de solo lectura porque pandas devuelve vistas
+    # así (copy-on-write); los arrays comunes también se aceptan.
+    # Los canales pueden venir en float32 (cargar_csv_stream) o float64;
+    # el tiempo siempre es float64.
+    _F64_1D = types.Array(types.float64, 1, 'A', readonly=True)
+    _F32_1D = types.Array(types.float32, 1, 'A', readonly=True)
+    _SALIDA_STATS = types.Tuple((types.int64,) + (types.float64,) * 5)
+    _FIRMA_STATS = [_SALIDA_STATS(_F64_1D), _SALIDA_STATS(_F32_1D)]
+    _SALIDA_LTTB = types.UniTuple(types.float64[::1], 2)
+    _FIRMA_LTTB = [_SALIDA_LTTB(_F64_1D, _F64_1D, types.int64),
+                   _SALIDA_LTTB(_F64_1D, _F32_1D, types.int64)]
+except ImportError:
+    _HAY_NUMBA = False
+    _FIRMA_STATS = None
+    _FIRMA_LTTB = None
+    
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+def _a_float(arr):
+    """
+    Devuelve el array como float32/float64 sin copiarlo si ya lo es
+    
+    Los kernels solo aceptan esos tipos; las columnas enteras (motor 'python')
+    se convierten a float64.
+    
+    Args:
+        arr: Array de numpy
+        
+    Returns:
+        ndarray: arr o una copia en float64
+    """
+    if arr.dtype == np.float32 or arr.dtype == np.float64:
+        return arr
+    return arr.astype(np.float64)
+
+# Optimizaciones de fastmath que no asumen ausencia de NaN/inf
+# (los kernels usan np.isnan, que con fastmath=True se puede eliminar)
+_FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+
+@njit(_FIRMA_STATS, cache=True, fastmath=_FASTMATH)
+def _stats_kernel(x):
+    """
+    Calcula mínimo, máximo, promedio, desvío estándar y promedio de x^2
+    en una sola pasada (Welford para promedio/desvío). Ignora los NaN.
+    
+    Args:
+        x: Array de valores (float32 o float64)
+        
+    Returns:
+        tuple: (n, minimo, maximo, promedio, std, promedio de x^2)
+               n es la cantidad de valores válidos; el resto es NaN si n == 0
+    """
+    n = 0
+    mn = np.inf
+    mx = -np.inf
+    m = 0.0
+    m2 = 0.0
+    s2 = 0.0
+    
+    for i in range(x.size):
+        v = x[i]
+        if np.isnan(v):
+            continue
+        n += 1
+        if v < mn:
+            mn = v
+        if v > mx:
+            mx = v
+        d = v - m
+        m += d / n
+        m2 += d * (v - m)
+        s2 += v * v
+    
+    if n == 0:
+        return 0, np.nan, np.nan, np.nan, np.nan, np.nan
+    
+    # Desvío muestral (ddof=1) como en pandas
+    std = (m2 / (n - 1)) ** 0.5 if n > 1 else np.nan
+    
+    return n, mn, mx, m, std, s2 / n
+
+
+def _stats_numpy(x):
+    """
+    Versión con reducciones de numpy de _stats_kernel (para cuando no hay numba)
+    
+    Hace varias pasadas sobre los datos pero cada una en C, mucho más rápido
+    que el bucle del kernel interpretado.
+    
+    Args:
+        x: Array de valores
+        
+    Returns:
+        tuple: Lo mismo que _stats_kernel
+    """
+    n = int(x.size - np.count_nonzero(np.isnan(x)))
+    
+    if n == 0:
+        return 0, np.nan, np.nan, np.nan, np.nan, np.nan
+    
+    # Desvío muestral (ddof=1) como en pandas
+    std = float(np.nanstd(x, ddof=1, dtype=np.float64)) if n > 1 else np.nan
+    
+    return (n, float(np.nanmin(x)), float(np.nanmax(x)), float(np.nanmean(x, dtype=np.float64)),
+            std, float(np.nanmean(np.square(x, dtype=np.float64))))
+
+
+# Estadísticas de un canal: kernel compilado si hay numba, numpy si no
+_stats = _stats_kernel if _HAY_NUMBA else _stats_numpy